@@ -0,0 +1,79 @@
+"""
+Compare per-file decryption latency and throughput of the in-process openpgp backend
+against python-gnupg, which spawns the gpg binary for every file.
+
+Usage:
+    python -m benchmarks.decrypt_benchmark --files 20 --size 262144
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import gnupg
+
+from my_proof import openpgp
+
+
+def make_fixtures(gpg, count, size, passphrase, workdir):
+    """Encrypt `count` random JSON payloads of roughly `size` bytes with a passphrase."""
+    paths = []
+    for idx in range(count):
+        payload = b'{"contributions": "' + os.urandom(size // 2).hex().encode() + b'"}'
+        path = os.path.join(workdir, f"file_{idx}.gpg")
+        result = gpg.encrypt(payload, recipients=None, symmetric='AES256', passphrase=passphrase,
+                             armor=False, output=path)
+        if not result.ok:
+            raise RuntimeError(f"Encryption failed: {result.stderr}")
+        paths.append(path)
+    return paths
+
+
+def decrypt_with_gpg(gpg, path, passphrase):
+    with open(path, 'rb') as encrypted_file:
+        result = gpg.decrypt_file(encrypted_file, passphrase=passphrase)
+    if not result.ok:
+        raise RuntimeError(f"Decryption failed: {result.stderr}")
+    return len(result.data)
+
+
+def decrypt_in_process(path, passphrase):
+    with open(path, 'rb') as encrypted_file:
+        return openpgp.decrypt_stream(encrypted_file, passphrase, io.BytesIO())
+
+
+def run_backend(name, decrypt, paths):
+    latencies = []
+    total_bytes = 0
+    for path in paths:
+        start = time.perf_counter()
+        total_bytes += decrypt(path)
+        latencies.append(time.perf_counter() - start)
+
+    elapsed = sum(latencies)
+    print(f"{name:<8} files={len(paths)} "
+          f"mean={statistics.mean(latencies) * 1000:.1f}ms "
+          f"p50={statistics.median(latencies) * 1000:.1f}ms "
+          f"max={max(latencies) * 1000:.1f}ms "
+          f"throughput={total_bytes / elapsed / 1e6:.2f}MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20, help="number of encrypted files")
+    parser.add_argument('--size', type=int, default=256 * 1024, help="approximate plaintext size per file in bytes")
+    parser.add_argument('--passphrase', default='benchmark-signature')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        gpg = gnupg.GPG(gnupghome=workdir)
+        paths = make_fixtures(gpg, args.files, args.size, args.passphrase, workdir)
+
+        run_backend('gpg', lambda path: decrypt_with_gpg(gpg, path, args.passphrase), paths)
+        run_backend('openpgp', lambda path: decrypt_in_process(path, args.passphrase), paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ import sys
 import traceback
 import zipfile
 from typing import Dict, Any
+from my_proof import metrics
 from my_proof.proof import Proof
+from my_proof.proof_of_authenticity import parse_witnesses
 
 # Default to 'production' if NODE_ENV is not set
 environment = os.environ.get('NODE_ENV', 'production')
@@ -31,6 +33,10 @@ def load_config() -> Dict[str, Any]:
         'redis_host': os.environ.get('REDIS_HOST', None),
         'redis_pwd': os.environ.get('REDIS_PWD', None),
         'redis_username': os.environ.get('REDIS_USERNAME', ''),
+        'require_witness_signatures': os.environ.get('REQUIRE_WITNESS_SIGNATURES', 'false').lower() == 'true',
+        'reclaim_witnesses': parse_witnesses(os.environ.get('RECLAIM_WITNESS_ADDRESSES')),
+        'metrics_file': os.environ.get('METRICS_FILE', 'metrics.prom'),  # Use a non-.prom name for OpenMetrics
+        'metrics_port': int(os.environ.get('METRICS_PORT', 0)),  # Serve live metrics when set
         'use_sealing': os.path.isdir(SEALED_DIR)
     }
     logging.info(f"Using config: {json.dumps(config, indent=2)}")
@@ -46,13 +52,29 @@ def run() -> None:
         raise FileNotFoundError(f"No input files found in {INPUT_DIR}")
     extract_input()
 
-    proof = Proof(config)
-    proof_response = proof.generate()
+    if config['metrics_port']:
+        metrics.start_http_server(config['metrics_port'])
 
-    output_path = os.path.join(OUTPUT_DIR, "results.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(proof_response, f, indent=2)
-    logging.info(f"Proof generation complete: {proof_response}")
+    try:
+        proof = Proof(config)
+        proof_response = proof.generate()
+
+        output_path = os.path.join(OUTPUT_DIR, "results.json")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(proof_response, f, indent=2)
+        logging.info(f"Proof generation complete: {proof_response}")
+    finally:
+        write_metrics(config)
+
+
+def write_metrics(config: Dict[str, Any]) -> None:
+    """Write run metrics into the output directory without masking a proof failure."""
+    if not config.get('metrics_file'):
+        return
+    try:
+        metrics.write_textfile(os.path.join(OUTPUT_DIR, config['metrics_file']))
+    except OSError as e:
+        logging.warning(f"Could not write metrics: {e}")
 
 
 def extract_input() -> None:
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from my_proof import metrics
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MiB
+CHUNK_SIZE = 8192
+
+
+class DownloadCache:
+    """
+    Content-addressed on-disk cache for encrypted file downloads.
+
+    Blobs are stored under objects/<sha256 of ciphertext>, so fileIds pointing at identical
+    ciphertext share a single blob. index.json maps each URL to its blob and the ETag /
+    Last-Modified validators used for conditional re-fetches.
+    Least recently used blobs are evicted once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DownloadCache":
+        return cls(
+            os.environ.get('DOWNLOAD_CACHE_DIR', './download/cache'),
+            int(os.environ.get('DOWNLOAD_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest)
+
+    def fetch(self, file_url: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (blob path, sha256) for the URL, revalidating a cached copy with a conditional request.
+        Returns None if the file could not be downloaded.
+        """
+        with self._lock:
+            index = self._load_index()
+            entry = index["urls"].get(file_url)
+            cached_digest = entry["sha256"] if entry and os.path.exists(self.object_path(entry["sha256"])) else None
+
+            headers = {}
+            if cached_digest:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            with metrics.download_duration.time():
+                response = requests.get(file_url, headers=headers, stream=True)
+
+                if response.status_code == 304 and cached_digest:
+                    logging.info(f"Download cache hit (not modified) for {file_url}")
+                    metrics.downloads.inc('not_modified')
+                    digest = cached_digest
+                elif response.status_code == 200:
+                    digest = self._store(response)
+                    metrics.downloads.inc('fetched')
+                    index["urls"][file_url] = {
+                        "sha256": digest,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                else:
+                    metrics.downloads.inc('failed')
+                    return None  # File not found or any other non-200 response
+
+            os.utime(self.object_path(digest))  # Mark as recently used for eviction
+            self._evict(keep=digest)
+            self._save_index()
+            return self.object_path(digest), digest
+
+    def _store(self, response: requests.Response) -> str:
+        """Stream the response body into the object store and return its digest."""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        sha256 = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    sha256.update(chunk)
+                    tmp_file.write(chunk)
+                    metrics.download_bytes.inc(amount=len(chunk))
+            digest = sha256.hexdigest()
+            if os.path.exists(self.object_path(digest)):
+                logging.info(f"Download cache already holds identical ciphertext {digest}")
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, self.object_path(digest))
+            return digest
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _evict(self, keep: str) -> None:
+        """
+        Remove least recently used blobs until the store fits in max_bytes. The blob being
+        returned is kept even if it alone exceeds the limit; it is evicted on a later fetch.
+        """
+        blobs = []
+        for name in os.listdir(self.objects_dir):
+            if name == keep:
+                continue
+            stat = os.stat(os.path.join(self.objects_dir, name))
+            blobs.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in blobs) + os.path.getsize(self.object_path(keep))
+        evicted = set()
+        for _, size, name in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.objects_dir, name))
+            evicted.add(name)
+            total -= size
+
+        if evicted:
+            logging.info(f"Evicted {len(evicted)} blobs from download cache")
+            index = self._load_index()
+            index["urls"] = {url: entry for url, entry in index["urls"].items() if entry["sha256"] not in evicted}
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as index_file:
+                    self._index = json.load(index_file)
+            except (OSError, ValueError):
+                self._index = {}
+            self._index.setdefault("urls", {})
+        return self._index
+
+    def _save_index(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as index_file:
+            json.dump(self._index, index_file)
+        os.replace(tmp_path, self.index_path)
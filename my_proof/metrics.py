@@ -0,0 +1,162 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow downloads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(label_names: Sequence[str], label_values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """A monotonically increasing value, optionally split by label values."""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f'{self.name}_total{_format_labels(self.label_names, labels)} {value}'
+                for labels, value in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, with a running sum and count."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts, then sum, then count
+        self._lock = threading.Lock()
+
+    def observe(self, amount: float, *label_values: str) -> None:
+        idx = bisect.bisect_left(self.buckets, amount)
+        with self._lock:
+            series = self._series.setdefault(label_values, [0] * (len(self.buckets) + 2))
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += amount
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % bound)
+                    lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+                bucket_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {series[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {series[-2]}')
+                lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render all metrics in the Prometheus text format, or OpenMetrics when requested."""
+        lines = []
+        for metric in self._metrics:
+            # OpenMetrics names counter families without the _total suffix its samples carry
+            family = metric.name if openmetrics or metric.type_name != 'counter' else f'{metric.name}_total'
+            lines.append(f'# HELP {family} {metric.documentation}')
+            lines.append(f'# TYPE {family} {metric.type_name}')
+            lines.extend(metric.samples())
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+proofs = REGISTRY.register(Counter('proof_generations', 'Proof generations by outcome', ['outcome']))
+proof_duration = REGISTRY.register(Histogram('proof_generation_duration_seconds', 'Time spent in Proof.generate'))
+uniqueness_duration = REGISTRY.register(Histogram('uniqueness_duration_seconds', 'Time spent in proof_of_uniqueness.main'))
+validator_requests = REGISTRY.register(Counter('validator_requests', 'Validator API calls by endpoint and outcome', ['endpoint', 'outcome']))
+validator_duration = REGISTRY.register(Histogram('validator_request_duration_seconds', 'Validator API call latency', ['endpoint']))
+redis_lookups = REGISTRY.register(Counter('redis_lookups', 'Redis lookups of prior file hashes by result', ['result']))
+downloads = REGISTRY.register(Counter('downloads', 'Encrypted file downloads by result', ['result']))
+download_duration = REGISTRY.register(Histogram('download_duration_seconds', 'Encrypted file download latency'))
+download_bytes = REGISTRY.register(Counter('download_bytes', 'Bytes of ciphertext downloaded'))
+decrypts = REGISTRY.register(Counter('decrypts', 'Decryptions of prior files by backend and result', ['backend', 'result']))
+decrypt_duration = REGISTRY.register(Histogram('decrypt_duration_seconds', 'Decryption latency per prior file', ['backend']))
+bytes_processed = REGISTRY.register(Counter('processed_bytes', 'Bytes of decrypted prior-file data processed'))
+hashes_compared = REGISTRY.register(Counter('hashes_compared', 'Hashes of the current submission compared against prior data'))
+
+
+def write_textfile(path: str, registry: Registry = REGISTRY) -> None:
+    """Atomically write metrics for the node exporter textfile collector (.prom) or as OpenMetrics."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as metrics_file:
+        metrics_file.write(registry.render(openmetrics=not path.endswith('.prom')))
+    os.replace(tmp_path, path)
+    logging.info(f"Metrics written to {path}")
+
+
+def start_http_server(port: int, addr: str = '0.0.0.0', registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve live metrics on /metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Serving metrics on {addr}:{port}/metrics")
+    return server
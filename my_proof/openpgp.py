@@ -0,0 +1,349 @@
+"""
+In-process decryption of passphrase-encrypted (symmetric) OpenPGP messages, RFC 4880.
+
+Supports a v4 symmetric-key encrypted session key packet (simple, salted or iterated and
+salted S2K) followed by a symmetrically encrypted integrity protected data packet (v1, with
+MDC), holding literal data that is optionally compressed. Anything else raises
+UnsupportedPacketError so callers can fall back to the gpg binary.
+"""
+import bz2
+import hashlib
+import zlib
+from typing import BinaryIO, Callable, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+
+try:
+    from cryptography.hazmat.decrepit.ciphers.modes import CFB
+except ImportError:  # cryptography < 47
+    from cryptography.hazmat.primitives.ciphers.modes import CFB
+
+CHUNK_SIZE = 65536
+
+# Packet tags
+TAG_SKESK = 3
+TAG_COMPRESSED = 8
+TAG_MARKER = 10
+TAG_LITERAL = 11
+TAG_SEIPD = 18
+
+MDC_LENGTH = 22  # 0xD3 0x14 header followed by a 20 byte SHA-1 digest
+
+# Symmetric algorithm id -> key size in bytes (AES only, block size 16)
+CIPHER_KEY_SIZES = {7: 16, 8: 24, 9: 32}
+
+HASH_ALGORITHMS = {1: 'md5', 2: 'sha1', 8: 'sha256', 9: 'sha384', 10: 'sha512', 11: 'sha224'}
+
+
+class UnsupportedPacketError(Exception):
+    """The message uses a packet type or algorithm this module does not handle."""
+
+
+class DecryptionError(Exception):
+    """The message could not be decrypted (wrong passphrase, corruption or failed integrity check)."""
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise DecryptionError("Unexpected end of OpenPGP data")
+    return data
+
+
+class _PacketBodyReader:
+    """Reads a packet body, following new-format partial body length chunks."""
+
+    def __init__(self, stream: BinaryIO, length: Optional[int], partial: bool):
+        self.stream = stream
+        self.remaining = length  # None means the body runs to the end of the stream
+        self.partial = partial
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while size != 0:
+            if self.remaining == 0:
+                if not self.partial:
+                    break
+                self.remaining, self.partial = _read_new_length(self.stream)
+                continue
+            if self.remaining is None:
+                want = size
+            else:
+                want = self.remaining if size < 0 or self.remaining < size else size
+            data = self.stream.read(want)
+            if self.remaining is None:
+                if not data:
+                    break
+            else:
+                if not data:
+                    raise DecryptionError("Unexpected end of OpenPGP data")
+                self.remaining -= len(data)
+            chunks.append(data)
+            if size > 0:
+                size -= len(data)
+        return b''.join(chunks)
+
+
+def _read_new_length(stream: BinaryIO) -> Tuple[int, bool]:
+    """Read a new-format length, returning (length, is_partial)."""
+    first = _read_exact(stream, 1)[0]
+    if first < 192:
+        return first, False
+    if first < 224:
+        return ((first - 192) << 8) + _read_exact(stream, 1)[0] + 192, False
+    if first == 255:
+        return int.from_bytes(_read_exact(stream, 4), 'big'), False
+    return 1 << (first & 0x1F), True
+
+
+def read_packet(stream: BinaryIO) -> Optional[Tuple[int, _PacketBodyReader]]:
+    """Read the next packet header, returning (tag, body reader), or None at end of stream."""
+    header = stream.read(1)
+    if not header:
+        return None
+    ctb = header[0]
+    if not ctb & 0x80:
+        raise UnsupportedPacketError("Not a binary OpenPGP packet (ASCII armor?)")
+
+    if ctb & 0x40:  # New format
+        length, partial = _read_new_length(stream)
+        return ctb & 0x3F, _PacketBodyReader(stream, length, partial)
+
+    tag, length_type = (ctb >> 2) & 0x0F, ctb & 0x03
+    if length_type == 3:
+        return tag, _PacketBodyReader(stream, None, False)
+    length = int.from_bytes(_read_exact(stream, 1 << length_type), 'big')
+    return tag, _PacketBodyReader(stream, length, False)
+
+
+def _derive_key(s2k_type: int, hash_id: int, salt: bytes, count: int, passphrase: bytes, key_size: int) -> bytes:
+    """
+    String-to-key derivation. Not cached: encryptors pick a random salt per message, so a cache
+    would never hit across files and would only keep passphrases in memory.
+    """
+    if hash_id not in HASH_ALGORITHMS:
+        raise UnsupportedPacketError(f"Unsupported S2K hash algorithm {hash_id}")
+
+    data = salt + passphrase
+    if s2k_type == 3:
+        count = max(count, len(data))
+        repeated = data * max(1, CHUNK_SIZE // len(data))
+
+    key = b''
+    preload = 0
+    while len(key) < key_size:
+        digest = hashlib.new(HASH_ALGORITHMS[hash_id])
+        digest.update(b'\x00' * preload)
+        if s2k_type == 3:
+            remaining = count
+            while remaining >= len(repeated):
+                digest.update(repeated)
+                remaining -= len(repeated)
+            digest.update(repeated[:remaining])
+        else:
+            digest.update(data)
+        key += digest.digest()
+        preload += 1
+    return key[:key_size]
+
+
+def _read_s2k(body: _PacketBodyReader) -> Tuple[int, int, bytes, int]:
+    s2k_type, hash_id = _read_exact(body, 2)
+    if s2k_type == 0:
+        return s2k_type, hash_id, b'', 0
+    if s2k_type == 1:
+        return s2k_type, hash_id, _read_exact(body, 8), 0
+    if s2k_type == 3:
+        salt = _read_exact(body, 8)
+        coded = _read_exact(body, 1)[0]
+        return s2k_type, hash_id, salt, (16 + (coded & 15)) << ((coded >> 4) + 6)
+    raise UnsupportedPacketError(f"Unsupported S2K specifier {s2k_type}")
+
+
+def _cfb_decryptor(key: bytes, iv: bytes = b'\x00' * 16):
+    return Cipher(algorithms.AES(key), CFB(iv)).decryptor()
+
+
+def _read_session_key(body: _PacketBodyReader, passphrase: bytes) -> Tuple[int, bytes]:
+    """Parse a symmetric-key encrypted session key packet and return (cipher id, session key)."""
+    version, cipher_id = _read_exact(body, 2)
+    if version != 4:
+        raise UnsupportedPacketError(f"Unsupported SKESK version {version}")
+    if cipher_id not in CIPHER_KEY_SIZES:
+        raise UnsupportedPacketError(f"Unsupported cipher algorithm {cipher_id}")
+
+    s2k_type, hash_id, salt, count = _read_s2k(body)
+    key = _derive_key(s2k_type, hash_id, salt, count, passphrase, CIPHER_KEY_SIZES[cipher_id])
+
+    encrypted_session_key = body.read()
+    if not encrypted_session_key:
+        return cipher_id, key
+
+    decrypted = _cfb_decryptor(key).update(encrypted_session_key)
+    session_cipher_id, session_key = decrypted[0], decrypted[1:]
+    if CIPHER_KEY_SIZES.get(session_cipher_id) != len(session_key):
+        raise DecryptionError("Bad passphrase: invalid session key")
+    return session_cipher_id, session_key
+
+
+class _IntegrityProtectedReader:
+    """Decrypts a v1 SEIPD body, holding back the trailing MDC packet until it can be verified."""
+
+    def __init__(self, body: _PacketBodyReader, cipher_id: int, session_key: bytes):
+        version = _read_exact(body, 1)[0]
+        if version != 1:
+            raise UnsupportedPacketError(f"Unsupported SEIPD version {version}")
+
+        self.body = body
+        self.decryptor = _cfb_decryptor(session_key)
+        self.mdc = hashlib.sha1()
+        self.finished = False
+
+        prefix = self.decryptor.update(_read_exact(body, 18))
+        if prefix[14:16] != prefix[16:18]:
+            raise DecryptionError("Bad passphrase: session key check failed")
+        self.mdc.update(prefix)
+        self.tail = b''
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.finished:
+            ciphertext = self.body.read(size if size > 0 else -1)
+            data = self.tail + self.decryptor.update(ciphertext)
+            if ciphertext and size > 0:
+                self.tail, data = data[-MDC_LENGTH:], data[:-MDC_LENGTH]
+                if data:
+                    self.mdc.update(data)
+                    return data
+                continue
+
+            # End of the packet: what is held back must be the MDC packet
+            self.decryptor.finalize()
+            self.finished = True
+            data, trailer = data[:-MDC_LENGTH], data[-MDC_LENGTH:]
+            self.mdc.update(data)
+            self.mdc.update(trailer[:2])
+            if trailer[:2] != b'\xd3\x14' or self.mdc.digest() != trailer[2:]:
+                raise DecryptionError("Modification detected: MDC check failed")
+            return data
+        return b''
+
+
+class _DecompressingReader:
+    def __init__(self, body: _PacketBodyReader):
+        algorithm = _read_exact(body, 1)[0]
+        if algorithm == 0:
+            self.decompressor = None
+        elif algorithm == 1:
+            self.decompressor = zlib.decompressobj(-15)
+        elif algorithm == 2:
+            self.decompressor = zlib.decompressobj()
+        elif algorithm == 3:
+            self.decompressor = bz2.BZ2Decompressor()
+        else:
+            raise UnsupportedPacketError(f"Unsupported compression algorithm {algorithm}")
+        self.body = body
+        self.buffer = b''
+        self.eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            compressed = self.body.read(CHUNK_SIZE)
+            try:
+                if not compressed:
+                    self.eof = True
+                    if hasattr(self.decompressor, 'flush'):
+                        self.buffer += self.decompressor.flush()
+                    break
+                self.buffer += self.decompressor.decompress(compressed) if self.decompressor else compressed
+            except (zlib.error, OSError, EOFError) as error:
+                raise DecryptionError(f"Corrupt compressed data: {error}") from error
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class _BufferedReader:
+    """Adapts a read(size) callable that may return short reads into one that fills requests exactly."""
+
+    def __init__(self, read: Callable[[int], bytes], chunk_size: int):
+        self._read = read
+        self.chunk_size = chunk_size
+        self.buffer = b''
+        self.eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            data = self._read(self.chunk_size)
+            if not data:
+                self.eof = True
+            self.buffer += data
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def _open_literal(stream) -> _PacketBodyReader:
+    """Unwrap compressed packets until the literal data packet, returning a reader over its contents."""
+    while True:
+        packet = read_packet(stream)
+        if packet is None:
+            raise DecryptionError("No literal data packet found")
+        tag, body = packet
+        if tag == TAG_COMPRESSED:
+            stream = _DecompressingReader(body)
+        elif tag == TAG_LITERAL:
+            _read_exact(body, 1)  # Data format
+            _read_exact(body, _read_exact(body, 1)[0])  # File name
+            _read_exact(body, 4)  # Modification date
+            return body
+        elif tag == TAG_MARKER:
+            body.read()
+        else:
+            raise UnsupportedPacketError(f"Unsupported packet tag {tag} in decrypted data")
+
+
+def decrypt_stream(source: BinaryIO, passphrase: str, destination: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Decrypt a symmetric OpenPGP message from source into destination, returning the number of
+    bytes written. The integrity check completes only after the last chunk is written, so on
+    DecryptionError the destination contents must be discarded.
+    """
+    passphrase_bytes = passphrase.encode('utf-8')
+    session: Optional[Tuple[int, bytes]] = None
+
+    while True:
+        packet = read_packet(source)
+        if packet is None:
+            raise DecryptionError("No encrypted data packet found")
+        tag, body = packet
+        if tag == TAG_SKESK:
+            if session is None:
+                session = _read_session_key(body, passphrase_bytes)
+            else:
+                body.read()
+        elif tag == TAG_MARKER:
+            body.read()
+        elif tag == TAG_SEIPD:
+            if session is None:
+                raise UnsupportedPacketError("Encrypted data without a symmetric session key")
+            decrypted = _IntegrityProtectedReader(body, *session)
+            break
+        else:
+            raise UnsupportedPacketError(f"Unsupported packet tag {tag}")
+
+    literal = _open_literal(_BufferedReader(decrypted.read, chunk_size))
+    written = 0
+    while True:
+        data = literal.read(chunk_size)
+        if not data:
+            break
+        destination.write(data)
+        written += len(data)
+
+    # Drain the encrypted packet so its MDC is verified even if the literal packet ended early
+    while decrypted.read(chunk_size):
+        pass
+    return written
+
@@ -3,17 +3,18 @@ import logging
 import os
 from typing import Dict, Any
 import requests
-from jwt import encode as jwt_encode
 import pandas as pd
 import numpy as np
 from typing import Any, List, Dict
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
-from my_proof.proof_of_authenticity import calculate_authenticity_score
-from my_proof.proof_of_ownership import calculate_ownership_score, generate_jwt_token
+from my_proof.proof_of_authenticity import calculate_authenticity_score, score_contributions
+from my_proof.proof_of_ownership import calculate_ownership_scores
 from my_proof.proof_of_quality import calculate_quality_n_type_score, points, calculate_max_points
-from my_proof.proof_of_uniqueness import uniqueness_helper
+from my_proof.proof_of_uniqueness import get_redis_client, uniqueness_helper
+from my_proof.validator_client import ValidatorClient, get_validator_client
 from my_proof.models.proof_response import ProofResponse
+from my_proof import metrics
 
 # Ensure logging is configured
 logging.basicConfig(level=logging.INFO)
@@ -35,48 +36,63 @@ class Proof:
         """Generate proofs for all input files."""
         logging.info("Starting proof generation")
 
-        for input_filename in os.listdir(self.config['input_dir']):
-            input_file = os.path.join(self.config['input_dir'], input_filename)
-            if os.path.splitext(input_file)[1].lower() == '.json':
-                with open(input_file, 'r', encoding='utf-8') as f:
-                    input_data = json.load(f)
-
-                logging.info(f"Processing file: {input_filename}")
-               
-                # self.proof_response_object['ownership'] = 1.0
-                wallet_w_types = self.extract_wallet_address_and_types(input_data) 
-                self.proof_response_object['ownership'] = self.calculate_ownership_score(wallet_w_types)
-                input_hash_details = uniqueness_helper(input_data)
-                unique_entry_details = input_hash_details.get("unique_entries")
-
-                final_scores =  self.calculate_individual_scores(input_data, self.config, unique_entry_details, valid_domains=["reclaimprotocol.org"])
-                self.proof_response_object['uniqueness'] = final_scores['uniqueness_score']
-                self.proof_response_object['quality'] = final_scores['quality_score']
-                self.proof_response_object['authenticity'] = final_scores['authenticity_score']
-                self.proof_response_object['score'] = final_scores['score']
-                self.proof_response_object['metadata'] = final_scores['metadata']
-
-                if self.proof_response_object['authenticity'] < 1.0:
-                    self.proof_response_object['valid'] = False
+        try:
+            with metrics.proof_duration.time():
+                self._generate()
+        except Exception:
+            metrics.proofs.inc('error')
+            raise
+        metrics.proofs.inc('valid' if self.proof_response_object['valid'] else 'invalid')
 
         logging.info(f"Proof response: {self.proof_response_object}")
         return self.proof_response_object
 
-    def generate_jwt_token(self, wallet_address):
-        secret_key = self.config.get('jwt_secret_key', 'default_secret')
-        expiration_time = self.config.get('jwt_expiration_time', 600)  # Set to 10 minutes (600 seconds)
-        
-        # Set the expiration time to 10 minutes from now
-        exp = datetime.now(timezone.utc) + timedelta(seconds=expiration_time)
-        
-        payload = {
-            'exp': exp,
-            'walletAddress': wallet_address  # Add wallet address to the payload
-        }
-        
-        # Encode the JWT
-        token = jwt_encode(payload, secret_key, algorithm='HS256')
-        return token
+    def _generate(self) -> None:
+        inputs = []
+        for input_filename in os.listdir(self.config['input_dir']):
+            input_file = os.path.join(self.config['input_dir'], input_filename)
+            if os.path.splitext(input_file)[1].lower() == '.json':
+                with open(input_file, 'r', encoding='utf-8') as f:
+                    inputs.append((input_filename, json.load(f)))
+        if not inputs:
+            return
+
+        # Look up ownership and prior files for every input up front so a multi-submission run
+        # makes batched validator calls instead of one call per file
+        submissions = [self.extract_wallet_address_and_types(input_data) for _, input_data in inputs]
+        ownership_scores = self.calculate_ownership_scores(submissions)
+        file_lists = self.validator_client.get_file_details_many([submission['walletAddress'] for submission in submissions])
+
+        # One connection per run, shared by the uniqueness lookups and the verified-claims cache
+        redis_client = get_redis_client()
+
+        for (input_filename, input_data), submission, ownership_score in zip(inputs, submissions, ownership_scores):
+            logging.info(f"Processing file: {input_filename}")
+
+            self.proof_response_object['ownership'] = ownership_score
+            input_hash_details = uniqueness_helper(input_data, redis_client, file_lists[submission['walletAddress']])
+            unique_entry_details = input_hash_details.get("unique_entries")
+
+            final_scores =  self.calculate_individual_scores(
+                input_data, self.config, unique_entry_details, valid_domains=["reclaimprotocol.org"], redis_client=redis_client,
+            )
+            self.proof_response_object['uniqueness'] = final_scores['uniqueness_score']
+            self.proof_response_object['quality'] = final_scores['quality_score']
+            self.proof_response_object['authenticity'] = final_scores['authenticity_score']
+            self.proof_response_object['score'] = final_scores['score']
+            self.proof_response_object['metadata'] = final_scores['metadata']
+
+            if self.proof_response_object['authenticity'] < 1.0:
+                self.proof_response_object['valid'] = False
+
+    @property
+    def validator_client(self) -> ValidatorClient:
+        """The shared validator client for this config, used for both ownership and file lookups."""
+        return get_validator_client(
+            self.config.get('validator_base_api_url'),
+            self.config.get('jwt_secret_key'),
+            self.config.get('jwt_expiration_time', 16000),
+        )
 
     def extract_wallet_address_and_types(self, input_data):
         wallet_address = input_data.get('walletAddress')
@@ -87,20 +103,28 @@ class Proof:
         """Calculate authenticity score."""
         contributions = input_data.get('contributions', [])
         valid_domains = ["wss://witness.reclaimprotocol.org/ws", "reclaimprotocol.org"]
-        return calculate_authenticity_score(contributions, valid_domains)
+        return calculate_authenticity_score(
+            contributions, valid_domains, self.config.get('require_witness_signatures', False),
+            trusted_witnesses=self.config.get('reclaim_witnesses'),
+        )
 
     def calculate_ownership_score(self, input_data: Dict[str, Any]) -> float:
         """Calculate ownership score."""
-        wallet_address = input_data.get('walletAddress')
-        types = input_data.get('types', [])
-        data = {
-            'walletAddress': wallet_address,
-            'types': types
-        }
-        
-        jwt_token = generate_jwt_token(wallet_address, self.config.get('jwt_secret_key'), self.config.get('jwt_expiration_time', 16000))
-        return calculate_ownership_score(jwt_token, data, self.config.get('validator_base_api_url'))
-    
+        return self.calculate_ownership_scores([input_data])[0]
+
+    def calculate_ownership_scores(self, submissions: List[Dict[str, Any]]) -> List[float]:
+        """Calculate ownership scores for several submissions in batched validator calls."""
+        data = [
+            {'walletAddress': submission.get('walletAddress'), 'types': submission.get('types', [])}
+            for submission in submissions
+        ]
+        return calculate_ownership_scores(
+            data,
+            self.config.get('validator_base_api_url'),
+            self.config.get('jwt_secret_key'),
+            self.config.get('jwt_expiration_time', 16000),
+        )
+
     def calculate_quality_score(self, input_data, unique_entries):
         return calculate_quality_n_type_score(input_data, self.config, unique_entries).get('quality_score', 0)
     
@@ -110,6 +134,7 @@ class Proof:
         config: Dict[str, Any], 
         unique_entry_details: List[Dict[str, Any]], 
         valid_domains: List[str],
+        redis_client=None,
     ) -> Dict[str, Any]:
         """
         Compute individual quality, uniqueness, and authenticity scores for each contribution type.
@@ -120,12 +145,14 @@ class Proof:
         
         # Calculate authenticity scores
         authenticity_scores = {}
-        for contribution in input_data['contributions']:
+        contributions = input_data['contributions']
+        auth_scores = score_contributions(
+            contributions, valid_domains, config.get('require_witness_signatures', False), redis_client,
+            config.get('reclaim_witnesses'),
+        )
+        for contribution, auth_score in zip(contributions, auth_scores):
             task_type = contribution['type']
             witness_urls = contribution.get('witnesses', [])
-            
-            # Determine if any valid domain is present
-            auth_score =  1 if any(domain in contribution.get('witnesses', '') for domain in valid_domains) else 0
             logging.info(f"Authenticity score for {task_type}: {auth_score}, with witness URLs: {witness_urls}")
             
             authenticity_scores[task_type] = auth_score
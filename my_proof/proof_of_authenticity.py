@@ -1,10 +1,236 @@
-from typing import Any, List, Dict
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, List, Dict, FrozenSet, Optional, Set
+from urllib.parse import urlparse
 
-def calculate_authenticity_score(contributions: List[Dict[str, Any]], valid_domains: List[str]) -> float:
-    """Calculate authenticity score by verifying if witness URLs contain any valid domain."""
-    valid_count = sum(
-        1 for contribution in contributions
-        if any(domain in contribution.get('witnesses', '') for domain in valid_domains)
+import redis
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_utils import keccak
+
+# Signed claims are verified inline below this count, and in chunks of this size across a process pool above it
+VERIFY_BATCH_SIZE = 16
+# Redis set holding cache keys of claims whose witness signatures have already been verified
+VERIFIED_CLAIMS_KEY = "reclaim:verified_claims"
+
+# Claims verified during this process, checked before Redis
+_verified_claims: Set[str] = set()
+
+
+def normalize_domains(valid_domains: List[str]) -> Set[str]:
+    """Reduce allow-list entries (bare domains or full witness URLs) to lowercase host names."""
+    hosts = set()
+    for domain in valid_domains:
+        host = urlparse(domain if '://' in domain else f'//{domain}').hostname
+        if host:
+            hosts.add(host.lower())
+    return hosts
+
+
+def is_allowed_witness_url(url: str, allowed_hosts: Set[str]) -> bool:
+    """Check whether the URL's host is an allowed domain or a subdomain of one."""
+    try:
+        host = urlparse(url if '://' in url else f'//{url}').hostname
+    except ValueError:
+        return False
+    return bool(host) and any(host == allowed or host.endswith(f'.{allowed}') for allowed in allowed_hosts)
+
+
+def get_signed_claims(contribution: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Return the Reclaim proofs attached to a contribution.
+
+    A proof may be attached under 'proof' / 'proofs' (a single proof or a list), or the
+    contribution itself may carry 'claimData' and 'signatures'.
+    """
+    if 'claimData' in contribution and 'signatures' in contribution:
+        return [contribution]
+
+    proofs = contribution.get('proofs', contribution.get('proof')) or []
+    if isinstance(proofs, dict):
+        proofs = [proofs]
+    return [proof for proof in proofs if isinstance(proof, dict) and 'claimData' in proof]
+
+
+def extract_witness_urls(contribution: Dict[str, Any]) -> List[str]:
+    """Collect the witness URLs submitted with a contribution."""
+    witnesses = contribution.get('witnesses')
+    if isinstance(witnesses, (str, dict)):
+        witnesses = [witnesses]
+
+    urls = []
+    for witness in witnesses or []:
+        url = witness.get('url') if isinstance(witness, dict) else witness
+        if isinstance(url, str) and url:
+            urls.append(url)
+    return urls
+
+
+def get_identifier_from_claim_info(provider: str, parameters: str, context: str) -> str:
+    """Compute the Reclaim claim identifier: keccak256 of provider, parameters and canonical context."""
+    if context:
+        try:
+            context = json.dumps(json.loads(context), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        except ValueError:
+            pass
+    return '0x' + keccak(text=f"{provider}\n{parameters}\n{context or ''}").hex()
+
+
+def parse_witnesses(value: Optional[str]) -> Dict[str, str]:
+    """
+    Parse trusted Reclaim witnesses from a comma-separated list of `address=url` entries.
+    Entries without a URL are accepted as `address`.
+    """
+    witnesses = {}
+    for entry in (value or '').split(','):
+        address, _, url = entry.strip().partition('=')
+        if address:
+            witnesses[address.strip().lower()] = url.strip()
+    return witnesses
+
+
+def trusted_witness_addresses(witnesses: Dict[str, str], valid_domains: List[str]) -> FrozenSet[str]:
+    """Addresses of configured witnesses whose URL, if given, is on an allowed domain."""
+    allowed_hosts = normalize_domains(valid_domains)
+    return frozenset(
+        address for address, url in witnesses.items()
+        if not url or is_allowed_witness_url(url, allowed_hosts)
+    )
+
+
+def claim_cache_key(proof: Dict[str, Any], trusted_addresses: FrozenSet[str]) -> str:
+    """Key a proof by its full claim data, its signatures and the witness set it was verified against."""
+    material = json.dumps(
+        [proof.get('claimData'), proof.get('signatures'), sorted(trusted_addresses)],
+        sort_keys=True, separators=(',', ':'), default=str,
     )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def verify_signed_claim(proof: Dict[str, Any], trusted_addresses: FrozenSet[str]) -> bool:
+    """
+    Verify a Reclaim proof: the identifier must match the claim info, and every signature
+    must recover to one of the trusted witness addresses. Witnesses declared in the proof
+    itself are not trusted.
+    """
+    try:
+        claim = proof['claimData']
+        identifier = get_identifier_from_claim_info(claim['provider'], claim['parameters'], claim.get('context', ''))
+        if identifier != str(claim.get('identifier', '')).lower():
+            return False
+
+        signatures = proof.get('signatures') or []
+        if not trusted_addresses or not signatures:
+            return False
+
+        message = "\n".join([identifier, str(claim['owner']).lower(), str(claim['timestampS']), str(claim['epoch'])])
+        signable = encode_defunct(text=message)
+        signers = {Account.recover_message(signable, signature=signature).lower() for signature in signatures}
+        return signers <= trusted_addresses
+    except Exception as error:
+        logging.warning(f"Witness signature verification failed: {error}")
+        return False
+
+
+def verify_signed_claims(proofs: List[Dict[str, Any]], trusted_addresses: FrozenSet[str], redis_client=None) -> List[bool]:
+    """
+    Verify a batch of proofs, skipping those already verified in this process or recorded in Redis.
+    Large batches are verified in chunks across a process pool.
+    """
+    keys = [claim_cache_key(proof, trusted_addresses) for proof in proofs]
+    results = [key in _verified_claims for key in keys]
+    pending = [idx for idx, verified in enumerate(results) if not verified]
+
+    if redis_client and pending:
+        try:
+            pipeline = redis_client.pipeline()
+            for idx in pending:
+                pipeline.sismember(VERIFIED_CLAIMS_KEY, keys[idx])
+            for idx, cached in zip(pending, pipeline.execute()):
+                results[idx] = bool(cached)
+            pending = [idx for idx in pending if not results[idx]]
+        except redis.RedisError as error:
+            logging.warning(f"Redis lookup of verified claims failed, verifying all signatures: {error}")
+
+    logging.info(f"Verifying {len(pending)} signed claims ({len(proofs) - len(pending)} cached)")
+
+    verify = partial(verify_signed_claim, trusted_addresses=trusted_addresses)
+    if len(pending) > VERIFY_BATCH_SIZE:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            verified = list(executor.map(verify, [proofs[idx] for idx in pending], chunksize=VERIFY_BATCH_SIZE))
+    else:
+        verified = [verify(proofs[idx]) for idx in pending]
+
+    newly_verified = []
+    for idx, ok in zip(pending, verified):
+        results[idx] = ok
+        if ok:
+            newly_verified.append(keys[idx])
+
+    _verified_claims.update(keys[idx] for idx, ok in enumerate(results) if ok)
+    if redis_client and newly_verified:
+        try:
+            redis_client.sadd(VERIFIED_CLAIMS_KEY, *newly_verified)
+        except redis.RedisError as error:
+            logging.warning(f"Could not record verified claims in Redis: {error}")
+
+    return results
+
+
+def score_contributions(
+    contributions: List[Dict[str, Any]],
+    valid_domains: List[str],
+    require_signatures: bool = False,
+    redis_client=None,
+    trusted_witnesses: Optional[Dict[str, str]] = None,
+) -> List[int]:
+    """
+    Score each contribution 1 or 0 for authenticity.
+
+    Attached Reclaim proofs must all be signed by trusted witnesses (configured addresses on an
+    allowed domain). Contributions without proofs pass if a submitted witness URL is on an
+    allowed domain, unless require_signatures is set. When no trusted witnesses are configured
+    and signatures are not required, contributions with proofs get the same domain check.
+    """
+    allowed_hosts = normalize_domains(valid_domains)
+    trusted_addresses = trusted_witness_addresses(trusted_witnesses or {}, valid_domains)
+    claims_per_contribution = [get_signed_claims(contribution) for contribution in contributions]
+    check_signatures = bool(trusted_addresses) or require_signatures
+
+    all_claims = [proof for claims in claims_per_contribution for proof in claims]
+    if all_claims and not trusted_addresses:
+        if require_signatures:
+            logging.warning("No trusted Reclaim witnesses configured; signed claims cannot be verified")
+        else:
+            logging.warning("No trusted Reclaim witnesses configured; checking witness domains of signed claims instead")
+    verify = all_claims and trusted_addresses
+    verified = iter(verify_signed_claims(all_claims, trusted_addresses, redis_client) if verify else [])
+
+    scores = []
+    for contribution, claims in zip(contributions, claims_per_contribution):
+        if claims and check_signatures:
+            authentic = bool(trusted_addresses) and all([next(verified) for _ in claims])
+        else:
+            witness_urls = extract_witness_urls(contribution)
+            for proof in claims:
+                if proof is not contribution:
+                    witness_urls += extract_witness_urls(proof)
+            authentic = not require_signatures and any(is_allowed_witness_url(url, allowed_hosts) for url in witness_urls)
+        scores.append(1 if authentic else 0)
+    return scores
+
 
-    return valid_count / len(contributions) if contributions else 0
\ No newline at end of file
+def calculate_authenticity_score(
+    contributions: List[Dict[str, Any]],
+    valid_domains: List[str],
+    require_signatures: bool = False,
+    redis_client=None,
+    trusted_witnesses: Optional[Dict[str, str]] = None,
+) -> float:
+    """Calculate authenticity score from verified witness signatures and allowed witness domains."""
+    scores = score_contributions(contributions, valid_domains, require_signatures, redis_client, trusted_witnesses)
+    return sum(scores) / len(contributions) if contributions else 0
@@ -8,8 +8,18 @@ import os
 from urllib.parse import urlparse
 import requests
 import gnupg
-from jwt import encode as jwt_encode
-from datetime import datetime, timedelta, timezone
+
+from my_proof import metrics, openpgp
+from my_proof.download_cache import DownloadCache
+from my_proof.validator_client import get_validator_client
+
+DOWNLOAD_FOLDER = "./download"
+
+# Shared across runs in the same process so repeat fetches are revalidated instead of re-downloaded
+download_cache = DownloadCache.from_env()
+
+# Default for redis_client arguments: connect with get_redis_client(). Pass None to run without Redis.
+CONNECT_REDIS = object()
 
 # Connect to Redis
 def get_redis_client():
@@ -120,6 +130,7 @@ def compare_secured_data(processed_curr_data: list, processed_old_data: list):
             type_unique_score = (len(unique_hashes) / len(total_hashes)) if total_hashes else 0
 
         total_score += type_unique_score  # Sum up scores
+        metrics.hashes_compared.inc(amount=len(total_hashes))
 
         # Add results
         result.append({
@@ -155,49 +166,66 @@ def get_unique_entries(comparison_results):
     ]
 
 def download_file(file_url, save_path):
-    response = requests.get(file_url, stream=True)
-    
-    if response.status_code == 200:
-        with open(save_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        return save_path  # File downloaded successfully
+    """
+    Download file_url, returning (local ciphertext path, sha256) or None on failure. When caching
+    is enabled the path is a content-addressed blob; otherwise it is save_path and the digest is None.
+    """
+    if download_cache.enabled:
+        return download_cache.fetch(file_url)
+
+    with metrics.download_duration.time():
+        response = requests.get(file_url, stream=True)
+        
+        if response.status_code == 200:
+            with open(save_path, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=8192):
+                    file.write(chunk)
+                    metrics.download_bytes.inc(amount=len(chunk))
+            metrics.downloads.inc('fetched')
+            return save_path, None  # File downloaded successfully
     
+    metrics.downloads.inc('failed')
     return None  # Return None if file is not found or any other non-200 response
 
-def download_and_decrypt(file_url, signature):
+def decrypt_to_file(encrypted_file_path, signature, output_path):
+    """
+    Decrypt a passphrase-encrypted file into output_path in-process, falling back to the gpg
+    binary for messages the openpgp module does not support.
+    """
     try:
-        # Ensure the download folder exists
-        download_folder = "./download"
-        os.makedirs(download_folder, exist_ok=True)
-        
-        # Define paths
-        encrypted_file_path = os.path.join(download_folder, "encrypted_file.gpg")
-        decrypted_file_path = os.path.join(download_folder, "decrypted.json")
-        decrypted_zip_path = os.path.join(download_folder, "decrypted.zip")
-        extracted_folder = os.path.join(download_folder, "extracted")
-
-        # Initialize GPG instance
-        gpg = gnupg.GPG()
-
-        # Download the encrypted file
-        result = download_file(file_url, encrypted_file_path)
-        if not result:  # Skip if download failed
-            return None  
-
-        # Read encrypted content
+        with metrics.decrypt_duration.time('openpgp'):
+            with open(encrypted_file_path, 'rb') as encrypted_file, open(output_path, 'wb') as decrypted_file:
+                openpgp.decrypt_stream(encrypted_file, signature, decrypted_file)
+        metrics.decrypts.inc('openpgp', 'ok')
+        return
+    except openpgp.UnsupportedPacketError as error:
+        logging.info(f"Falling back to gpg for decryption: {error}")
+    except openpgp.DecryptionError as error:
+        metrics.decrypts.inc('openpgp', 'failed')
+        raise Exception(f"Decryption failed: {error}")
+
+    # Initialize GPG instance
+    gpg = gnupg.GPG()
+
+    with metrics.decrypt_duration.time('gpg'):
         with open(encrypted_file_path, 'rb') as encrypted_file:
-            encrypted_data = encrypted_file.read()
+            decrypted_data = gpg.decrypt_file(encrypted_file, passphrase=signature, output=output_path)
 
-        # Decrypt the data
-        decrypted_data = gpg.decrypt(encrypted_data, passphrase=signature)
+    if not decrypted_data.ok:
+        metrics.decrypts.inc('gpg', 'failed')
+        raise Exception(f"Decryption failed: {decrypted_data.stderr}")
+    metrics.decrypts.inc('gpg', 'ok')
 
-        if not decrypted_data.ok:
-            raise Exception(f"Decryption failed: {decrypted_data.stderr}")
+def decrypt_file(encrypted_file_path, signature):
+    try:
+        # Define paths
+        decrypted_file_path = os.path.join(DOWNLOAD_FOLDER, "decrypted.json")
+        decrypted_zip_path = os.path.join(DOWNLOAD_FOLDER, "decrypted.zip")
+        extracted_folder = os.path.join(DOWNLOAD_FOLDER, "extracted")
 
-        # Save decrypted output
-        with open(decrypted_zip_path, 'wb') as decrypted_file:
-            decrypted_file.write(decrypted_data.data)
+        # Decrypt the data into the output file
+        decrypt_to_file(encrypted_file_path, signature, decrypted_zip_path)
+        metrics.bytes_processed.inc(amount=os.path.getsize(decrypted_zip_path))
 
         # Check if the decrypted file is a ZIP archive
         if zipfile.is_zipfile(decrypted_zip_path):
@@ -221,7 +249,8 @@ def download_and_decrypt(file_url, signature):
                 raise Exception("No JSON file found inside the decrypted ZIP")
         else:
             # If the decrypted output is not a ZIP, assume it's JSON
-            decrypted_json = json.loads(decrypted_data.data)
+            with open(decrypted_zip_path, 'rb') as decrypted_file:
+                decrypted_json = json.load(decrypted_file)
             with open(decrypted_file_path, 'w') as json_file:
                 json.dump(decrypted_json, json_file, indent=2)
 
@@ -232,53 +261,85 @@ def download_and_decrypt(file_url, signature):
         logging.warning(f"Error during decryption: {error}")
         return None
 
+def download_encrypted_file(file_url):
+    try:
+        # Ensure the download folder exists
+        os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+        return download_file(file_url, os.path.join(DOWNLOAD_FOLDER, "encrypted_file.gpg"))
+    except Exception as error:
+        logging.warning(f"Error during download: {error}")
+        return None
+
+def download_and_decrypt(file_url, signature):
+    # Download the encrypted file
+    downloaded = download_encrypted_file(file_url)
+    if not downloaded:  # Skip if download failed
+        return None
 
-# Fetch file mappings from API
-def generate_jwt_token(wallet_address: str, secret_key: str, expiration_time: int) -> str:
-    """Generate a JWT token for a given wallet address."""
-    exp = datetime.now(timezone.utc) + timedelta(seconds=expiration_time)
+    encrypted_file_path, _ = downloaded
+    return decrypt_file(encrypted_file_path, signature)
 
-    payload = {
-        'exp': exp,
-        'walletAddress': wallet_address  # Send wallet address in the payload
-    }
-    
-    # Encode the JWT
-    token = jwt_encode(payload, secret_key, algorithm='HS256')
-    return token
+def load_prior_file(file, signature, processed_by_digest):
+    """
+    Download, decrypt and hash a previously submitted file, or None if it could not be loaded.
+    Ciphertext already processed in this run (keyed by digest in processed_by_digest) is not
+    decrypted again; its earlier result is returned so scoring sees the file as before.
+    """
+    file_url = file.get("fileUrl")
 
-def get_file_details_from_wallet_address(wallet_address):
-    """Fetch file mappings for a given wallet address with JWT authentication."""
+    downloaded = download_encrypted_file(file_url)
+    if not downloaded:  # Skip if download failed
+        return None
+
+    encrypted_file_path, digest = downloaded
+    if digest and digest in processed_by_digest:
+        logging.info(f"Reusing processed data for fileId {file.get('fileId')}: ciphertext identical to an already processed file")
+        return processed_by_digest[digest]
+
+    decrypted_data = decrypt_file(encrypted_file_path, signature)
+    if not decrypted_data:
+        return None
+
+    # Load data from the decrypted JSON file
+    with open(decrypted_data, 'r', encoding="utf-8") as json_file:
+        downloaded_data = json.load(json_file)
+    processed = process_secured_data(downloaded_data.get("contributions"))
+    if digest:
+        processed_by_digest[digest] = processed
+    return processed
+
+
+# Fetch file mappings from API
+def get_validator_client_from_env():
+    """Return the shared validator client configured from environment variables."""
     validator_base_api_url = os.environ.get('VALIDATOR_BASE_API_URL')
     secret_key = os.environ.get('JWT_SECRET_KEY')  # Retrieve the secret key from environment variables
-    expiration_time = 600  # JWT expiration time in seconds (10 minutes)
+    expiration_time = int(os.environ.get('JWT_EXPIRATION_TIME', 600))  # Same as the proof config, so the client is shared
 
     if not validator_base_api_url or not secret_key:
         raise ValueError("VALIDATOR_BASE_API_URL and JWT_SECRET_KEY must be set in environment variables.")
 
-    jwt_token = generate_jwt_token(wallet_address, secret_key, expiration_time)
-
-    endpoint = "/api/userinfo"
-    url = f"{validator_base_api_url.rstrip('/')}{endpoint}"
+    return get_validator_client(validator_base_api_url, secret_key, expiration_time)
 
-    payload = {"walletAddress": wallet_address}  # Send walletAddress in the body
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {jwt_token}"  # Attach JWT token
-    }
+def get_file_details_from_wallet_address(wallet_address):
+    """Fetch file mappings for a given wallet address with JWT authentication."""
+    return get_validator_client_from_env().get_file_details(wallet_address)
 
-    response = requests.post(url, json=payload, headers=headers)  # Make POST request
+def get_file_details_from_wallet_addresses(wallet_addresses):
+    """Fetch file mappings for several wallet addresses in batched calls, keyed by wallet address."""
+    return get_validator_client_from_env().get_file_details_many(wallet_addresses)
 
-    if response.status_code == 200:
-        return response.json()  # Return JSON response
-    else:
-        return []  # Return empty list in case of an error
+def main(curr_file_id, curr_input_data, file_list, redis_client=CONNECT_REDIS):
+    with metrics.uniqueness_duration.time():
+        if redis_client is CONNECT_REDIS:
+            redis_client = get_redis_client()
+        return _main(curr_file_id, curr_input_data, file_list, redis_client)
 
-def main(curr_file_id, curr_input_data, file_list):
-    redis_client = get_redis_client()
+def _main(curr_file_id, curr_input_data, file_list, redis_client):
     processed_curr_data = process_secured_data(curr_input_data.get("contributions", []))
     processed_old_data = []
     sign = os.environ.get("SIGNATURE")
+    processed_by_digest = {}
     if redis_client:
         pipeline = redis_client.pipeline()
         for file in file_list:
@@ -286,6 +347,7 @@ def main(curr_file_id, curr_input_data, file_list):
         stored_data_list = pipeline.execute()
 
         for idx, stored_data in enumerate(stored_data_list):
+            metrics.redis_lookups.inc('hit' if stored_data else 'miss')
             if stored_data:
                 # If the data exists in Redis, process it
                 processed_old_data.extend(json.loads(stored_data))
@@ -294,16 +356,13 @@ def main(curr_file_id, curr_input_data, file_list):
                 # If data is not found in Redis, download and process the file
                 file_url = file_list[idx].get("fileUrl")
                 if file_url:
-                    decrypted_data = download_and_decrypt(file_url, sign)
-                    if not decrypted_data:  # Skip if download failed
+                    downloaded_data = load_prior_file(file_list[idx], sign, processed_by_digest)
+                    if downloaded_data is None:  # Skip if download failed
                         logging.warning(f"Skipping file {file_url} due to download error.")
                         continue  # Move to the next file
                     logging.info(f"Download called for fileId: {file_list[idx].get('fileId')}")
-                    # Load data from the downloaded JSON file
-                    with open(decrypted_data, 'r', encoding="utf-8") as json_file:
-                        downloaded_data = json.load(json_file)
-                    # Process and append the new data
-                    processed_old_data += process_secured_data(downloaded_data.get("contributions"))
+                    # Append the new data
+                    processed_old_data += downloaded_data
 
         logging.info(f"Processed Redis data: {processed_old_data}")
 
@@ -312,15 +371,12 @@ def main(curr_file_id, curr_input_data, file_list):
         for file in file_list:
             file_url = file.get("fileUrl")
             if file_url:
-                decrypted_data = download_and_decrypt(file_url, sign)
-                if not decrypted_data:  # Skip if download failed
+                downloaded_data = load_prior_file(file, sign, processed_by_digest)
+                if downloaded_data is None:  # Skip if download failed
                         logging.warning(f"Skipping file {file_url} due to download error.")
                         continue  # Move to the next file
                 logging.info(f"Download called for file: {file_url}")
-                # Load data from the decrypted JSON file
-                with open(decrypted_data, 'r', encoding="utf-8") as json_file:
-                    downloaded_data = json.load(json_file)
-                processed_old_data += process_secured_data(downloaded_data.get("contributions"))
+                processed_old_data += downloaded_data
 
     # Store current data in Redis if available
     if redis_client:
@@ -335,13 +391,14 @@ def main(curr_file_id, curr_input_data, file_list):
         "result": response["comparison_results"] 
     }
 
-def uniqueness_helper(curr_input_data):
-    wallet_address = curr_input_data.get('walletAddress')
-    file_list = get_file_details_from_wallet_address(wallet_address) 
+def uniqueness_helper(curr_input_data, redis_client=CONNECT_REDIS, file_list=None):
+    if file_list is None:
+        wallet_address = curr_input_data.get('walletAddress')
+        file_list = get_file_details_from_wallet_address(wallet_address) 
     logging.info(f"File list: {file_list}")
     curr_file_id = os.environ.get('FILE_ID') 
     logging.info(f"Current file id: {curr_file_id}")
-    response = main(curr_file_id, curr_input_data, file_list)
+    response = main(curr_file_id, curr_input_data, file_list, redis_client)
     res = {
         "unique_entries": get_unique_entries(response.get("result")),
         "uniqueness_score": response.get("avg_score")
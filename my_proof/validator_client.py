@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+
+import requests
+from jwt import encode as jwt_encode
+
+from my_proof import metrics
+
+USERINFO_ENDPOINT = "/api/userinfo"
+USERINFO_BATCH_ENDPOINT = "/api/userinfo/batch"
+DATAVALIDATION_ENDPOINT = "/api/datavalidation"
+DATAVALIDATION_BATCH_ENDPOINT = "/api/datavalidation/batch"
+
+# Re-mint a cached JWT this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 30
+MAX_BATCH_SIZE = 100
+
+
+class ValidatorClient:
+    """
+    Validator API client for runs that process many submissions.
+
+    Lookups for several wallets are coalesced into calls to the batched endpoints, falling back
+    to one call per wallet when the validator does not expose them. JWTs are reused until shortly
+    before they expire, and concurrent lookups for the same wallet share a single request.
+    """
+
+    def __init__(self, base_url: str, secret_key: str, expiration_time: int = 600, max_batch_size: int = MAX_BATCH_SIZE):
+        if not base_url or not secret_key:
+            raise ValueError("VALIDATOR_BASE_API_URL and JWT_SECRET_KEY must be set in environment variables.")
+        self.base_url = base_url.rstrip('/')
+        self.secret_key = secret_key
+        self.expiration_time = expiration_time
+        self.max_batch_size = max_batch_size
+        self.session = requests.Session()
+        self._tokens: Dict[Tuple[str, ...], Tuple[str, float]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._batch_supported = {USERINFO_BATCH_ENDPOINT: True, DATAVALIDATION_BATCH_ENDPOINT: True}
+        self._lock = threading.Lock()
+
+    def get_token(self, wallet_addresses: Tuple[str, ...]) -> str:
+        """Return a JWT for the wallet addresses, minting a new one only when the cached one is about to expire."""
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(wallet_addresses)
+            if cached and cached[1] - TOKEN_REFRESH_MARGIN > now:
+                return cached[0]
+
+        exp = int(now + self.expiration_time)
+        payload = {'exp': exp}
+        if len(wallet_addresses) == 1:
+            payload['walletAddress'] = wallet_addresses[0]
+        else:
+            payload['walletAddresses'] = list(wallet_addresses)
+        token = jwt_encode(payload, self.secret_key, algorithm='HS256')
+
+        with self._lock:
+            self._tokens = {key: value for key, value in self._tokens.items() if value[1] > now}
+            self._tokens[wallet_addresses] = (token, exp)
+        return token
+
+    def get_file_details(self, wallet_address: str) -> List[Dict[str, Any]]:
+        """Fetch file mappings for a single wallet address."""
+        return self.get_file_details_many([wallet_address])[wallet_address]
+
+    def get_file_details_many(self, wallet_addresses: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch file mappings for several wallet addresses, keyed by wallet address."""
+        return self._coalesce(wallet_addresses, self._fetch_file_details)
+
+    def validate_ownership(self, data: Dict[str, Any]) -> float:
+        """Validate ownership of a single submission, returning 1.0 or 0.0."""
+        return self.validate_ownership_many([data])[0]
+
+    def validate_ownership_many(self, submissions: Sequence[Dict[str, Any]]) -> List[float]:
+        """Validate ownership of several submissions, returning a score per submission."""
+        for data in submissions:
+            if not data.get('walletAddress') or len(data.get('types', [])) == 0:
+                raise ValueError('Invalid data format. Ensure walletAddress is a non-empty string and types is a non-empty array.')
+
+        keys = [(data['walletAddress'], tuple(data['types'])) for data in submissions]
+        results = self._coalesce(keys, self._fetch_validations)
+        return [results[key] for key in keys]
+
+    def _coalesce(self, keys: Sequence[Hashable], fetch: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Resolve each distinct key once. Keys already being fetched by another caller are awaited,
+        the rest are fetched together with a single call to fetch.
+        """
+        owned, futures = [], {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    owned.append(key)
+                futures[key] = future
+
+        if owned:
+            try:
+                results = fetch(owned)
+                for key in owned:
+                    futures[key].set_result(results[key])
+            except Exception as error:
+                for key in owned:
+                    if not futures[key].done():
+                        futures[key].set_exception(error)
+            finally:
+                with self._lock:
+                    for key in owned:
+                        self._inflight.pop(key, None)
+
+        return {key: future.result() for key, future in futures.items()}
+
+    def _post(self, endpoint: str, wallet_addresses: Tuple[str, ...], body: Any) -> requests.Response:
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.get_token(wallet_addresses)}",
+        }
+        try:
+            with metrics.validator_duration.time(endpoint):
+                response = self.session.post(f"{self.base_url}{endpoint}", json=body, headers=headers)
+        except requests.exceptions.RequestException:
+            metrics.validator_requests.inc(endpoint, 'error')
+            raise
+        metrics.validator_requests.inc(endpoint, str(response.status_code))
+        return response
+
+    def _post_batch(self, endpoint: str, wallet_addresses: Tuple[str, ...], body: Any):
+        """POST to a batched endpoint, returning None (and remembering it) if the validator lacks it."""
+        if not self._batch_supported[endpoint]:
+            return None
+        response = self._post(endpoint, wallet_addresses, body)
+        if response.status_code in (404, 405):
+            logging.info(f"Validator does not support {endpoint}, falling back to per-wallet requests")
+            self._batch_supported[endpoint] = False
+            return None
+        return response
+
+    def _chunks(self, items: List[Any]):
+        for start in range(0, len(items), self.max_batch_size):
+            yield items[start:start + self.max_batch_size]
+
+    def _fetch_file_details(self, wallet_addresses: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        results = {}
+        for chunk in self._chunks(wallet_addresses):
+            response = None
+            if len(chunk) > 1:
+                response = self._post_batch(USERINFO_BATCH_ENDPOINT, tuple(chunk), {"walletAddresses": chunk})
+            if response is not None:
+                files = response.json().get("results", {}) if response.status_code == 200 else {}
+                results.update({wallet_address: files.get(wallet_address, []) for wallet_address in chunk})
+                continue
+
+            for wallet_address in chunk:
+                response = self._post(USERINFO_ENDPOINT, (wallet_address,), {"walletAddress": wallet_address})
+                results[wallet_address] = response.json() if response.status_code == 200 else []
+        return results
+
+    def _fetch_validations(self, keys: List[Tuple[str, Tuple[str, ...]]]) -> Dict[Tuple[str, Tuple[str, ...]], float]:
+        results = {}
+        for chunk in self._chunks(keys):
+            items = [{'walletAddress': wallet_address, 'types': list(types)} for wallet_address, types in chunk]
+            try:
+                response = None
+                if len(chunk) > 1:
+                    wallet_addresses = tuple(dict.fromkeys(wallet_address for wallet_address, _ in chunk))
+                    response = self._post_batch(DATAVALIDATION_BATCH_ENDPOINT, wallet_addresses, {"items": items})
+                if response is not None:
+                    response.raise_for_status()
+                    valid = response.json().get("results", [])
+                    results.update({key: 1.0 if idx < len(valid) and valid[idx] else 0.0 for idx, key in enumerate(chunk)})
+                    continue
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error during API request: {e}")
+                results.update({key: 0.0 for key in chunk})
+                continue
+
+            for key, item in zip(chunk, items):
+                try:
+                    response = self._post(DATAVALIDATION_ENDPOINT, (item['walletAddress'],), item)
+                    response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
+                    results[key] = 1.0 if response.status_code == 200 else 0.0
+                except requests.exceptions.RequestException as e:
+                    logging.error(f"Error during API request: {e}")
+                    results[key] = 0.0
+        return results
+
+
+_clients: Dict[Tuple[str, str, int], ValidatorClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_validator_client(base_url: str, secret_key: str, expiration_time: int = 600) -> ValidatorClient:
+    """Return a shared client per validator and secret so tokens and in-flight lookups are reused across calls."""
+    key = (base_url, secret_key, expiration_time)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = ValidatorClient(base_url, secret_key, expiration_time)
+        return _clients[key]
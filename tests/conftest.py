@@ -0,0 +1,140 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+
+JWT_SECRET = "test-secret"
+
+
+class StandInValidator:
+    """
+    Local stand-in for the validator API serving both the per-wallet and the batched endpoints.
+
+    Every request must carry a valid JWT naming the wallets in its body. Requests are recorded in
+    `calls` as (path, body, claims). Set `batch_status` to make the batched endpoints answer with
+    that status instead (e.g. 404 for a validator without them), `delay` to slow responses down,
+    and add wallets to `invalid_wallets` to fail their ownership validation.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.batch_status = None
+        self.delay = 0.0
+        self.invalid_wallets = set()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def paths(self):
+        return [path for path, _, _ in self.calls]
+
+    def _handler(self):
+        validator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+                try:
+                    claims = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+                except jwt.InvalidTokenError:
+                    return self._send(401, {"error": "invalid token"})
+                with validator._lock:
+                    validator.calls.append((self.path, body, claims))
+                time.sleep(validator.delay)
+
+                if self.path.endswith('/batch') and validator.batch_status:
+                    return self._send(validator.batch_status, {})
+                if self.path == '/api/userinfo':
+                    assert claims['walletAddress'] == body['walletAddress']
+                    return self._send(200, [{"fileId": f"{body['walletAddress']}-1"}])
+                if self.path == '/api/userinfo/batch':
+                    assert sorted(claims['walletAddresses']) == sorted(body['walletAddresses'])
+                    files = {wallet: [{"fileId": f"{wallet}-1"}] for wallet in body['walletAddresses']}
+                    return self._send(200, {"results": files})
+                if self.path == '/api/datavalidation':
+                    valid = body['walletAddress'] not in validator.invalid_wallets
+                    return self._send(200 if valid else 400, {} if valid else {"error": "invalid"})
+                if self.path == '/api/datavalidation/batch':
+                    results = [item['walletAddress'] not in validator.invalid_wallets for item in body['items']]
+                    return self._send(200, {"results": results})
+                return self._send(404, {})
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def validator():
+    stand_in = StandInValidator()
+    thread = threading.Thread(target=stand_in.server.serve_forever, daemon=True)
+    thread.start()
+    yield stand_in
+    stand_in.server.shutdown()
+    stand_in.server.server_close()
+
+
+class StandInFileServer:
+    """
+    Serves `files` (path -> bytes) with an ETag per file, answering If-None-Match with 304.
+    Requests are recorded in `requests` as (path, If-None-Match header).
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        file_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                file_server.requests.append((self.path, self.headers.get('If-None-Match')))
+                if self.path not in file_server.files:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                data = file_server.files[self.path]
+                etag = '"%s"' % hashlib.sha256(data).hexdigest()[:16]
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def file_server():
+    stand_in = StandInFileServer()
+    thread = threading.Thread(target=stand_in.server.serve_forever, daemon=True)
+    thread.start()
+    yield stand_in
+    stand_in.server.shutdown()
+    stand_in.server.server_close()
@@ -0,0 +1,66 @@
+import hashlib
+import os
+
+import pytest
+
+from my_proof.download_cache import DownloadCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DownloadCache(str(tmp_path / "cache"))
+
+
+def test_unchanged_file_is_revalidated_not_downloaded_again(file_server, cache):
+    file_server.files['/a.gpg'] = b'ciphertext-a'
+
+    first = cache.fetch(f"{file_server.url}/a.gpg")
+    second = DownloadCache(cache.cache_dir).fetch(f"{file_server.url}/a.gpg")  # index survives restarts
+
+    assert first == second == (cache.object_path(hashlib.sha256(b'ciphertext-a').hexdigest()), hashlib.sha256(b'ciphertext-a').hexdigest())
+    assert [etag is not None for _, etag in file_server.requests] == [False, True]
+
+
+def test_changed_file_is_downloaded_again(file_server, cache):
+    file_server.files['/a.gpg'] = b'ciphertext-a'
+    cache.fetch(f"{file_server.url}/a.gpg")
+    file_server.files['/a.gpg'] = b'ciphertext-b'
+
+    path, digest = cache.fetch(f"{file_server.url}/a.gpg")
+
+    assert digest == hashlib.sha256(b'ciphertext-b').hexdigest()
+    with open(path, 'rb') as blob:
+        assert blob.read() == b'ciphertext-b'
+
+
+def test_identical_ciphertext_shares_one_blob(file_server, cache):
+    file_server.files['/a.gpg'] = file_server.files['/copy-of-a.gpg'] = b'ciphertext-a'
+
+    first = cache.fetch(f"{file_server.url}/a.gpg")
+    second = cache.fetch(f"{file_server.url}/copy-of-a.gpg")
+
+    assert first == second
+    assert os.listdir(cache.objects_dir) == [first[1]]
+
+
+def test_missing_file_returns_none(file_server, cache):
+    assert cache.fetch(f"{file_server.url}/missing.gpg") is None
+
+
+def test_least_recently_used_blobs_are_evicted(file_server, tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"), max_bytes=50)
+    file_server.files.update({'/a.gpg': b'a' * 30, '/b.gpg': b'b' * 30, '/big.gpg': b'c' * 100})
+
+    _, digest_a = cache.fetch(f"{file_server.url}/a.gpg")
+    _, digest_b = cache.fetch(f"{file_server.url}/b.gpg")
+    assert os.listdir(cache.objects_dir) == [digest_b]
+
+    # A blob larger than the limit is still kept for the caller that fetched it
+    path, digest_big = cache.fetch(f"{file_server.url}/big.gpg")
+    assert os.listdir(cache.objects_dir) == [digest_big]
+    with open(path, 'rb') as blob:
+        assert blob.read() == b'c' * 100
+
+    # Evicted URLs are fetched unconditionally next time
+    cache.fetch(f"{file_server.url}/a.gpg")
+    assert file_server.requests[-1] == ('/a.gpg', None)
@@ -0,0 +1,61 @@
+import urllib.request
+
+import pytest
+
+from my_proof.metrics import Counter, Histogram, Registry, start_http_server, write_textfile
+
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    requests = registry.register(Counter('requests', 'Requests by outcome', ['outcome']))
+    latency = registry.register(Histogram('latency_seconds', 'Request latency', buckets=(0.1, 1.0)))
+    requests.inc('ok')
+    requests.inc('ok')
+    requests.inc('error')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    return registry
+
+
+def test_prometheus_text_format(registry):
+    assert registry.render() == '\n'.join([
+        '# HELP requests_total Requests by outcome',
+        '# TYPE requests_total counter',
+        'requests_total{outcome="error"} 1',
+        'requests_total{outcome="ok"} 2',
+        '# HELP latency_seconds Request latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        'latency_seconds_sum 5.55',
+        'latency_seconds_count 3',
+    ]) + '\n'
+
+
+def test_openmetrics_format(registry):
+    lines = registry.render(openmetrics=True).splitlines()
+
+    # Counter families drop the _total suffix their samples keep
+    assert lines[:3] == ['# HELP requests Requests by outcome', '# TYPE requests counter', 'requests_total{outcome="error"} 1']
+    assert lines[-1] == '# EOF'
+
+
+def test_textfile_format_follows_extension(registry, tmp_path):
+    write_textfile(str(tmp_path / 'metrics.prom'), registry)
+    write_textfile(str(tmp_path / 'metrics.txt'), registry)
+
+    assert (tmp_path / 'metrics.prom').read_text() == registry.render()
+    assert (tmp_path / 'metrics.txt').read_text() == registry.render(openmetrics=True)
+
+
+def test_http_server_serves_metrics(registry):
+    server = start_http_server(0, '127.0.0.1', registry)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+            assert response.read().decode() == registry.render()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,129 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from my_proof import openpgp, proof_of_uniqueness
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+PASSPHRASE = "fixture-signature"
+PLAINTEXT = json.dumps({"contributions": [{"type": "REDDIT", "securedSharedData": {"posts": [f"post-{i}" for i in range(500)]}}]}).encode()
+
+requires_gpg = pytest.mark.skipif(shutil.which("gpg") is None, reason="gpg is not installed")
+
+
+def decrypt(data, passphrase=PASSPHRASE, chunk_size=openpgp.CHUNK_SIZE):
+    output = io.BytesIO()
+    written = openpgp.decrypt_stream(io.BytesIO(data), passphrase, output, chunk_size)
+    assert written == len(output.getvalue())
+    return output.getvalue()
+
+
+@pytest.fixture(scope="module")
+def gpg_encrypt(tmp_path_factory):
+    """Encrypt PLAINTEXT with the gpg binary using the given extra options."""
+    home = tmp_path_factory.mktemp("gnupg")
+    os.chmod(home, 0o700)
+
+    def encrypt(*options, plaintext=PLAINTEXT):
+        result = subprocess.run(
+            ["gpg", "--homedir", str(home), "--batch", "--yes", "--pinentry-mode", "loopback",
+             "--passphrase", PASSPHRASE, *options, "--symmetric", "--output", "-"],
+            input=plaintext, capture_output=True, check=True,
+        )
+        return result.stdout
+
+    return encrypt
+
+
+def test_partial_body_lengths():
+    # Streamed output, as openpgp.js and gpg reading a pipe emit it: SEIPD and literal
+    # packets split into partial body length chunks, without compression
+    with open(os.path.join(FIXTURES, "partial_body_lengths.gpg"), "rb") as encrypted_file:
+        encrypted = encrypted_file.read()
+    with open(os.path.join(FIXTURES, "partial_body_lengths.json"), "rb") as plaintext_file:
+        expected = plaintext_file.read()
+
+    tag, body = openpgp.read_packet(io.BytesIO(encrypted[15:]))
+    assert tag == openpgp.TAG_SEIPD and body.partial
+
+    assert decrypt(encrypted) == expected
+    assert decrypt(encrypted, chunk_size=1000) == expected
+
+
+@requires_gpg
+@pytest.mark.parametrize("cipher", ["AES", "AES192", "AES256"])
+@pytest.mark.parametrize("compression", ["none", "zip", "zlib", "bzip2"])
+def test_gpg_round_trip(gpg_encrypt, cipher, compression):
+    encrypted = gpg_encrypt("--cipher-algo", cipher, "--compress-algo", compression)
+
+    assert decrypt(encrypted) == PLAINTEXT
+
+
+@requires_gpg
+@pytest.mark.parametrize("s2k_options", [
+    ("--s2k-mode", "0"),
+    ("--s2k-mode", "1"),
+    ("--s2k-mode", "3", "--s2k-count", "65536"),
+    ("--s2k-digest-algo", "SHA512"),
+])
+def test_gpg_string_to_key_variants(gpg_encrypt, s2k_options):
+    encrypted = gpg_encrypt("--rfc4880", "--cipher-algo", "AES256", *s2k_options)
+
+    assert decrypt(encrypted) == PLAINTEXT
+
+
+@requires_gpg
+def test_wrong_passphrase(gpg_encrypt):
+    with pytest.raises(openpgp.DecryptionError):
+        decrypt(gpg_encrypt(), passphrase="not-the-signature")
+
+
+@requires_gpg
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_tampered_ciphertext(gpg_encrypt, compression):
+    encrypted = bytearray(gpg_encrypt("--compress-algo", compression))
+    encrypted[len(encrypted) // 2] ^= 0x01
+
+    with pytest.raises(openpgp.DecryptionError):
+        decrypt(bytes(encrypted))
+
+
+@requires_gpg
+def test_truncated_ciphertext(gpg_encrypt):
+    encrypted = gpg_encrypt("--compress-algo", "none")
+
+    for length in (10, len(encrypted) // 2, len(encrypted) - 1):
+        with pytest.raises(openpgp.DecryptionError):
+            decrypt(encrypted[:length])
+
+
+@requires_gpg
+def test_armored_message_is_unsupported(gpg_encrypt):
+    with pytest.raises(openpgp.UnsupportedPacketError):
+        decrypt(gpg_encrypt("--armor"))
+
+
+@requires_gpg
+def test_non_aes_cipher_is_unsupported(gpg_encrypt):
+    with pytest.raises(openpgp.UnsupportedPacketError):
+        decrypt(gpg_encrypt("--cipher-algo", "CAST5"))
+
+
+def test_empty_input():
+    with pytest.raises(openpgp.DecryptionError):
+        decrypt(b"")
+
+
+@requires_gpg
+@pytest.mark.parametrize("options", [("--armor",), ("--cipher-algo", "CAST5")])
+def test_unsupported_messages_fall_back_to_gpg(gpg_encrypt, tmp_path, options):
+    encrypted_path, output_path = tmp_path / "encrypted.gpg", tmp_path / "decrypted.json"
+    encrypted_path.write_bytes(gpg_encrypt(*options))
+
+    proof_of_uniqueness.decrypt_to_file(str(encrypted_path), PASSPHRASE, str(output_path))
+
+    assert output_path.read_bytes() == PLAINTEXT
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from my_proof import proof as proof_module
+from my_proof.proof import Proof
+from my_proof.proof_of_ownership import calculate_ownership_score
+from tests.conftest import JWT_SECRET
+
+
+def write_submission(input_dir, name, wallet_address):
+    submission = {
+        "walletAddress": wallet_address,
+        "contributions": [{
+            "type": "REDDIT",
+            "witnesses": "wss://witness.reclaimprotocol.org/ws",
+            "securedSharedData": {"posts": [f"{wallet_address}-post"]},
+        }],
+    }
+    (input_dir / name).write_text(json.dumps(submission))
+
+
+@pytest.fixture
+def config(validator, tmp_path, monkeypatch):
+    monkeypatch.setattr(proof_module, 'get_redis_client', lambda: None)
+    monkeypatch.setenv('VALIDATOR_BASE_API_URL', 'http://unused.invalid')
+    return {
+        'dlp_id': 29,
+        'input_dir': tmp_path,
+        'validator_base_api_url': validator.url,
+        'jwt_secret_key': JWT_SECRET,
+        'jwt_expiration_time': 600,
+    }
+
+
+def test_multi_submission_run_batches_validator_calls(validator, config, tmp_path):
+    for idx, wallet_address in enumerate(['w1', 'w2', 'w3']):
+        write_submission(tmp_path, f"submission_{idx}.json", wallet_address)
+
+    response = Proof(config).generate()
+
+    assert response['valid'] and response['ownership'] == 1.0
+    assert sorted(validator.paths()) == ['/api/datavalidation/batch', '/api/userinfo/batch']
+
+
+def test_single_submission_run(validator, config, tmp_path):
+    validator.invalid_wallets = {'w1'}
+    write_submission(tmp_path, "submission.json", 'w1')
+
+    response = Proof(config).generate()
+
+    assert response['ownership'] == 0.0
+    assert sorted(validator.paths()) == ['/api/datavalidation', '/api/userinfo']
+
+
+def test_old_ownership_signature_fails_clearly(validator):
+    with pytest.raises(TypeError, match="validator client mints JWTs"):
+        calculate_ownership_score("a-jwt", {'walletAddress': 'w1', 'types': ['REDDIT']}, validator.url)
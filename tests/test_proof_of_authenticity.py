@@ -0,0 +1,146 @@
+import copy
+import json
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from my_proof import proof_of_authenticity
+from my_proof.proof_of_authenticity import (
+    VERIFY_BATCH_SIZE,
+    claim_cache_key,
+    get_identifier_from_claim_info,
+    is_allowed_witness_url,
+    normalize_domains,
+    score_contributions,
+    verify_signed_claim,
+    verify_signed_claims,
+)
+
+VALID_DOMAINS = ["wss://witness.reclaimprotocol.org/ws", "reclaimprotocol.org"]
+WITNESS_URL = "wss://witness.reclaimprotocol.org/ws"
+
+witness = Account.create()
+stranger = Account.create()
+
+
+def make_proof(account=witness, owner="0x00000000000000000000000000000000000000aa", parameters='{"url":"https://example.com"}', timestamp=1700000000):
+    context = json.dumps({"extractedParameters": {"username": "alice"}, "providerHash": "0x1"})
+    claim = {
+        "provider": "http",
+        "parameters": parameters,
+        "context": context,
+        "owner": owner,
+        "timestampS": timestamp,
+        "epoch": 1,
+        "identifier": get_identifier_from_claim_info("http", parameters, context),
+    }
+    message = "\n".join([claim["identifier"], owner.lower(), str(timestamp), "1"])
+    signature = Account.sign_message(encode_defunct(text=message), account.key).signature.hex()
+    return {"claimData": claim, "signatures": ["0x" + signature.removeprefix("0x")], "witnesses": [{"id": account.address, "url": WITNESS_URL}]}
+
+
+def trusted(*accounts):
+    return frozenset(account.address.lower() for account in accounts)
+
+
+@pytest.fixture(autouse=True)
+def clear_verified_claims():
+    proof_of_authenticity._verified_claims.clear()
+    yield
+    proof_of_authenticity._verified_claims.clear()
+
+
+def test_trusted_signer_is_accepted():
+    assert verify_signed_claim(make_proof(), trusted(witness))
+
+
+def test_untrusted_signer_is_rejected():
+    # The proof declares its own signer as witness; only configured witnesses count
+    assert not verify_signed_claim(make_proof(stranger), trusted(witness))
+
+
+@pytest.mark.parametrize("field, value", [
+    ("parameters", '{"url":"https://evil.example.com"}'),
+    ("owner", "0x00000000000000000000000000000000000000bb"),
+    ("timestampS", 1800000000),
+])
+def test_tampered_claim_is_rejected(field, value):
+    proof = make_proof()
+    proof["claimData"][field] = value
+    if field == "parameters":
+        claim = proof["claimData"]
+        claim["identifier"] = get_identifier_from_claim_info(claim["provider"], claim["parameters"], claim["context"])
+
+    assert not verify_signed_claim(proof, trusted(witness))
+
+
+def test_mismatched_identifier_is_rejected():
+    proof = make_proof()
+    proof["claimData"]["parameters"] = '{"url":"https://evil.example.com"}'
+
+    assert not verify_signed_claim(proof, trusted(witness))
+
+
+def test_cache_hit_does_not_survive_tampering():
+    proof = make_proof()
+    assert verify_signed_claims([proof], trusted(witness)) == [True]
+
+    tampered = copy.deepcopy(proof)
+    tampered["claimData"]["owner"] = "0x00000000000000000000000000000000000000bb"
+
+    assert claim_cache_key(tampered, trusted(witness)) != claim_cache_key(proof, trusted(witness))
+    assert verify_signed_claims([proof, tampered], trusted(witness)) == [True, False]
+
+
+def test_cache_key_covers_trusted_witness_set():
+    proof = make_proof()
+
+    assert claim_cache_key(proof, trusted(witness)) != claim_cache_key(proof, trusted(witness, stranger))
+
+
+def test_large_batches_are_verified_in_a_process_pool():
+    proofs = [make_proof(timestamp=1700000000 + idx) for idx in range(VERIFY_BATCH_SIZE + 4)]
+    proofs[3] = make_proof(stranger)
+
+    results = verify_signed_claims(proofs, trusted(witness))
+
+    assert results == [idx != 3 for idx in range(len(proofs))]
+
+
+@pytest.mark.parametrize("url, allowed", [
+    ("wss://witness.reclaimprotocol.org/ws", True),
+    ("https://reclaimprotocol.org", True),
+    ("reclaimprotocol.org", True),
+    ("wss://reclaimprotocol.org.evil.com/ws", False),
+    ("wss://evilreclaimprotocol.org/ws", False),
+    ("https://evil.com/?next=reclaimprotocol.org", False),
+])
+def test_witness_url_domain_check(url, allowed):
+    assert is_allowed_witness_url(url, normalize_domains(VALID_DOMAINS)) == allowed
+
+
+def test_signed_claims_fall_back_to_domain_check_without_trusted_witnesses():
+    contribution = {"type": "REDDIT", "proofs": [make_proof(stranger)]}
+    lookalike = {"type": "REDDIT", "proofs": [{**make_proof(stranger), "witnesses": [{"url": "wss://reclaimprotocol.org.evil.com/ws"}]}]}
+
+    assert score_contributions([contribution, lookalike], VALID_DOMAINS) == [1, 0]
+    assert score_contributions([contribution], VALID_DOMAINS, require_signatures=True) == [0]
+
+
+def test_signed_claims_are_verified_against_trusted_witnesses():
+    contributions = [
+        {"type": "REDDIT", "proofs": [make_proof()]},
+        {"type": "STEAM", "proofs": [make_proof(stranger)]},
+        {"type": "TWITTER", "witnesses": WITNESS_URL},
+    ]
+    witnesses = {witness.address.lower(): WITNESS_URL}
+
+    assert score_contributions(contributions, VALID_DOMAINS, trusted_witnesses=witnesses) == [1, 0, 1]
+    assert score_contributions(contributions, VALID_DOMAINS, True, trusted_witnesses=witnesses) == [1, 0, 0]
+
+
+def test_witnesses_off_allowed_domains_are_not_trusted():
+    witnesses = {witness.address.lower(): "wss://reclaimprotocol.org.evil.com/ws"}
+
+    assert score_contributions([{"type": "REDDIT", "proofs": [make_proof()]}], VALID_DOMAINS, True, trusted_witnesses=witnesses) == [0]
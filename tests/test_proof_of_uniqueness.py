@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from my_proof import proof_of_uniqueness
+from my_proof.download_cache import DownloadCache
+
+
+def submission(*posts):
+    return {"contributions": [{"type": "REDDIT", "securedSharedData": {"posts": list(posts)}}]}
+
+
+@pytest.fixture
+def decrypted(file_server, tmp_path, monkeypatch):
+    """Serve prior files as plain JSON "ciphertext" and record which blobs get decrypted."""
+    calls = []
+
+    def decrypt_file(encrypted_file_path, signature):
+        calls.append(encrypted_file_path)
+        return encrypted_file_path
+
+    monkeypatch.setattr(proof_of_uniqueness, 'download_cache', DownloadCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(proof_of_uniqueness, 'DOWNLOAD_FOLDER', str(tmp_path / "download"))
+    monkeypatch.setattr(proof_of_uniqueness, 'decrypt_file', decrypt_file)
+    return calls
+
+
+def test_identical_prior_files_are_decrypted_once_and_still_scored(file_server, decrypted):
+    file_server.files.update({
+        '/a.gpg': json.dumps(submission('post-1')).encode(),
+        '/b.gpg': json.dumps(submission('post-2')).encode(),
+    })
+    file_server.files['/a-again.gpg'] = file_server.files['/a.gpg']
+    file_list = [{"fileId": fid, "fileUrl": f"{file_server.url}/{fid}.gpg"} for fid in ('a', 'b', 'a-again')]
+
+    response = proof_of_uniqueness.main('current', submission('post-1'), file_list, redis_client=None)
+
+    # The last prior file per type is the baseline, so post-1 is compared against the repeated file
+    assert response['avg_score'] == 0
+    assert len(decrypted) == 2
+
+
+def test_failed_downloads_are_skipped(file_server, decrypted):
+    file_server.files['/b.gpg'] = json.dumps(submission('post-2')).encode()
+    file_list = [{"fileId": "missing", "fileUrl": f"{file_server.url}/missing.gpg"}, {"fileId": "b", "fileUrl": f"{file_server.url}/b.gpg"}]
+
+    response = proof_of_uniqueness.main('current', submission('post-1', 'post-2'), file_list, redis_client=None)
+
+    assert response['avg_score'] == 0.5
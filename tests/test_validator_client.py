@@ -0,0 +1,129 @@
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from my_proof import metrics
+from my_proof import validator_client as validator_client_module
+from my_proof.proof_of_ownership import calculate_ownership_score
+from my_proof.validator_client import ValidatorClient, get_validator_client
+from tests.conftest import JWT_SECRET
+
+
+@pytest.fixture
+def client(validator):
+    return ValidatorClient(validator.url, JWT_SECRET)
+
+
+def test_file_details_for_many_wallets_use_one_batched_call(validator, client):
+    results = client.get_file_details_many(['w1', 'w2', 'w3', 'w2'])
+
+    assert results == {wallet: [{"fileId": f"{wallet}-1"}] for wallet in ['w1', 'w2', 'w3']}
+    assert validator.paths() == ['/api/userinfo/batch']
+
+
+def test_batches_are_split_by_max_batch_size(validator):
+    client = ValidatorClient(validator.url, JWT_SECRET, max_batch_size=2)
+
+    client.get_file_details_many(['w1', 'w2', 'w3'])
+
+    assert validator.paths() == ['/api/userinfo/batch', '/api/userinfo']
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_falls_back_to_per_wallet_calls_without_batch_endpoint(validator, client, status):
+    validator.batch_status = status
+
+    assert client.get_file_details_many(['w1', 'w2'])['w2'] == [{"fileId": "w2-1"}]
+    assert client.get_file_details_many(['w3', 'w4'])['w4'] == [{"fileId": "w4-1"}]
+
+    # The missing batch endpoint is only probed once
+    assert validator.paths() == ['/api/userinfo/batch'] + ['/api/userinfo'] * 4
+
+
+def test_batch_error_returns_empty_file_lists(validator, client):
+    validator.batch_status = 500
+
+    assert client.get_file_details_many(['w1', 'w2']) == {'w1': [], 'w2': []}
+
+
+def test_concurrent_lookups_for_same_wallet_share_one_request(validator, client):
+    validator.delay = 0.2
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(client.get_file_details, ['w1'] * 8))
+
+    assert results == [[{"fileId": "w1-1"}]] * 8
+    assert validator.paths() == ['/api/userinfo']
+
+
+def test_tokens_are_reused_until_shortly_before_expiry(validator, monkeypatch):
+    minted = []
+    original_encode = validator_client_module.jwt_encode
+
+    def counting_encode(payload, *args, **kwargs):
+        minted.append(payload)
+        return original_encode(payload, *args, **kwargs)
+
+    monkeypatch.setattr(validator_client_module, 'jwt_encode', counting_encode)
+
+    long_lived = ValidatorClient(validator.url, JWT_SECRET, expiration_time=600)
+    long_lived.get_file_details('w1')
+    long_lived.get_file_details('w1')
+    assert len(minted) == 1
+
+    # Tokens expiring within the refresh margin are re-minted for every call
+    short_lived = ValidatorClient(validator.url, JWT_SECRET, expiration_time=validator_client_module.TOKEN_REFRESH_MARGIN)
+    short_lived.get_file_details('w1')
+    short_lived.get_file_details('w1')
+    assert len(minted) == 3
+
+
+def test_validate_ownership_many_uses_batched_call(validator, client):
+    validator.invalid_wallets = {'bad'}
+    submissions = [
+        {'walletAddress': 'good', 'types': ['REDDIT']},
+        {'walletAddress': 'bad', 'types': ['REDDIT']},
+        {'walletAddress': 'good', 'types': ['REDDIT']},
+    ]
+
+    assert client.validate_ownership_many(submissions) == [1.0, 0.0, 1.0]
+    assert validator.paths() == ['/api/datavalidation/batch']
+    assert len(validator.calls[0][1]['items']) == 2
+
+
+def test_validate_ownership_per_wallet_fallback(validator, client):
+    validator.batch_status = 404
+    validator.invalid_wallets = {'bad'}
+    submissions = [{'walletAddress': 'good', 'types': ['REDDIT']}, {'walletAddress': 'bad', 'types': ['STEAM']}]
+
+    assert client.validate_ownership_many(submissions) == [1.0, 0.0]
+    assert validator.paths() == ['/api/datavalidation/batch', '/api/datavalidation', '/api/datavalidation']
+
+
+def test_validate_ownership_rejects_invalid_data(client):
+    with pytest.raises(ValueError):
+        client.validate_ownership({'walletAddress': 'w1', 'types': []})
+
+
+def test_calculate_ownership_score_uses_shared_client(validator):
+    data = {'walletAddress': 'w1', 'types': ['REDDIT']}
+
+    assert calculate_ownership_score(data, validator.url, JWT_SECRET) == 1.0
+    assert get_validator_client(validator.url, JWT_SECRET) is get_validator_client(validator.url, JWT_SECRET)
+    assert validator.paths() == ['/api/datavalidation']
+
+
+def test_connection_failures_are_counted_as_errors():
+    def error_count():
+        prefix = 'validator_requests_total{endpoint="/api/datavalidation",outcome="error"} '
+        return sum(float(line[len(prefix):]) for line in metrics.validator_requests.samples() if line.startswith(prefix))
+
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        port = unused.getsockname()[1]
+    client = ValidatorClient(f"http://127.0.0.1:{port}", JWT_SECRET)
+    before = error_count()
+
+    assert client.validate_ownership({'walletAddress': 'w1', 'types': ['REDDIT']}) == 0.0
+    assert error_count() == before + 1